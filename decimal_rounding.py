@@ -1,8 +1,25 @@
 # decimal_rounding.py (kept)
+import math
 from decimal import Decimal, ROUND_HALF_UP
 
+_Q = Decimal("0.01")
+
 
 def round_to_decimal(number):
     decimal_number = Decimal(str(number))
-    rounded_number = decimal_number.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    rounded_number = decimal_number.quantize(_Q, rounding=ROUND_HALF_UP)
     return float(rounded_number)
+
+
+def round_money_fast(number: float) -> float:
+    """Same result as round_to_decimal for floats, without Decimal in the common case.
+
+    Only values sitting on (or within float noise of) a half cent need the exact
+    str()-based Decimal rounding; everything else rounds unambiguously.
+    """
+    cents = number * 100
+    whole = math.floor(cents)
+    frac = cents - whole
+    if abs(frac - 0.5) < 1e-6:
+        return round_to_decimal(number)
+    return (whole + (frac > 0.5)) / 100
@@ -1,9 +1,17 @@
 # df_creator.py (refactored)
 from __future__ import annotations
+import csv
 import io
-from typing import Dict, List, Any
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, List, Any, Mapping, Optional, Sequence, Tuple
 import pandas as pd
-from decimal_rounding import round_to_decimal
+from decimal_rounding import round_money_fast, round_to_decimal
+
+# Fast paths for the two date shapes we actually see (YYYY/MM/DD and M/D/YYYY)
+_YMD = re.compile(r"^(\d{4})/(\d{1,2})/(\d{1,2})$")
+_MDY = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
 
 
 class DfCreator:
@@ -12,13 +20,13 @@ class DfCreator:
     - Avoids deprecated DataFrame._append by buffering rows
     - Handles both "default" and "aag" formats
     - Tolerates items as (sku, qty) or (sku, qty, unit_cost)
-    - Provides CSV bytes via to_csv_bytes()
+    - Provides CSV bytes via to_csv_bytes() (csv.writer, no DataFrame)
     - Includes legacy helper `_order_invoice_matcher` used by tests
     """
 
     def __init__(
         self,
-        invoice_csv_headers: Dict[str, List[str]],
+        invoice_csv_headers: Mapping[str, Sequence[str]],
         dropshipper_data: Dict[str, Any],
     ):
         self.file_format_name: str = dropshipper_data["file_format_name"]
@@ -27,7 +35,10 @@ class DfCreator:
             raise ValueError(
                 f"Missing CSV headers for format '{self.file_format_name}'"
             )
-        self._rows: List[Dict[str, Any]] = []
+        # Rows are plain lists in header order, ready for csv.writer
+        self._cols: Sequence[str] = self.headers_map[self.file_format_name]
+        self._col_index: Dict[str, int] = {c: i for i, c in enumerate(self._cols)}
+        self._rows: List[List[Any]] = []
 
     # -------- Public API --------
     def populate_df(self, order: Dict[str, Any]) -> bool:
@@ -44,58 +55,98 @@ class DfCreator:
             print(f"Error while populating dataframe rows: {e}")
             return False
 
+    def is_empty(self) -> bool:
+        return not self._rows
+
     def to_dataframe(self) -> pd.DataFrame:
-        df = pd.DataFrame(self._rows)
-        cols = self.headers_map[self.file_format_name]
-        for c in cols:
-            if c not in df.columns:
-                df[c] = ""
-        df = df[cols]
-        return df
+        return pd.DataFrame(self._rows, columns=self._cols)
 
     def to_csv_bytes(self) -> bytes:
-        df = self.to_dataframe()
-        if df.empty:
+        # Rows and columns are already known; write them straight through csv
+        # instead of building a DataFrame just to serialize it.
+        if not self._rows:
             return b""
-        buf = io.StringIO(newline="")
-        df.to_csv(buf, index=False)
-        return buf.getvalue().encode("utf-8")
+        rows = self._rows
+        numeric_cols = self._numeric_columns()
+        if numeric_cols:
+            # Match pandas' number formatting for mixed int/float columns
+            rows = [self._pandas_cells(row, numeric_cols) for row in rows]
+        # Encode once into a single buffered bytes sink (no str copy + encode pass)
+        raw = io.BytesIO()
+        buf = io.BufferedWriter(raw, buffer_size=1 << 16)
+        text = io.TextIOWrapper(buf, encoding="utf-8", newline="")
+        # os.linesep matches the line endings pandas' to_csv produced before
+        writer = csv.writer(text, lineterminator=os.linesep)
+        writer.writerow(self._cols)
+        writer.writerows(rows)
+        text.flush()
+        buf.flush()
+        data = raw.getvalue()
+        text.detach()
+        buf.detach()
+        return data
+
+    def _numeric_columns(self) -> Dict[int, bool]:
+        """
+        Columns whose cells need pandas-style formatting, mapped to whether
+        pandas would infer them as float64 (only int/float/None, with a float
+        or ints next to None). float64 ints were written as 100.0; NaN/None as an
+        empty field in any column that holds floats.
+        """
+        numeric = {int, float, type(None)}
+        cols: Dict[int, bool] = {}
+        for i, values in enumerate(zip(*self._rows)):
+            kinds = {type(v) for v in values}
+            if kinds <= numeric and (float in kinds or kinds == {int, type(None)}):
+                cols[i] = True
+            elif float in kinds:
+                cols[i] = False
+        return cols
+
+    @staticmethod
+    def _pandas_cells(row: List[Any], cols: Dict[int, bool]) -> List[Any]:
+        row = row.copy()
+        for i, as_float in cols.items():
+            v = row[i]
+            if v is None or v != v:
+                row[i] = ""
+            elif as_float:
+                row[i] = float(v)
+        return row
 
     # -------- Internal builders --------
     def _add_default_rows(self, order: Dict[str, Any]) -> None:
-        base = {
-            "po_number": order.get("purchase_order_number", ""),
-            "invoice_number": order.get("order_id", ""),
-            "invoice_date": order.get("ship_date", ""),
-            "invoice_total_amount": order.get("subtotal", ""),
-            "invoice_subtotal_amount": self._safe_round(
-                (order.get("subtotal") or 0) - (order.get("tax") or 0)
-            ),
-            "invoice_tax_amount": order.get("tax", ""),
-        }
+        base = self._base_row(
+            {
+                "po_number": order.get("purchase_order_number", ""),
+                "invoice_number": order.get("order_id", ""),
+                "invoice_date": order.get("ship_date", ""),
+                "invoice_total_amount": order.get("subtotal", ""),
+                "invoice_subtotal_amount": self._safe_round(
+                    (order.get("subtotal") or 0) - (order.get("tax") or 0)
+                ),
+                "invoice_tax_amount": order.get("tax", ""),
+            }
+        )
+        slots = self._slots("line_item_sku", "line_item_quantity", "line_item_unit_cost")
         for item in order.get("items", []):
             sku = item[0]
             qty = item[1]
             unit_cost = item[2] if len(item) > 2 else ""
-            row = dict(base)
-            row.update(
-                {
-                    "line_item_sku": sku,
-                    "line_item_quantity": qty,
-                    "line_item_unit_cost": unit_cost,
-                }
-            )
-            self._rows.append(row)
+            self._rows.append(self._fill(base, slots, (sku, qty, unit_cost)))
 
     def _add_aag_rows(self, order: Dict[str, Any]) -> None:
-        base = {
-            "Invoice Number": order.get("order_id", ""),
-            "SONumber": order.get("purchase_order_number", ""),
-            "Date": self._normalize_date(order.get("ship_date", "")),
-            "Customer": "auto_accessories_garage",
-            "CarrierName": "FEDEX_GROUND",
-            "TrackingNumber": order.get("tracking_number", ""),
-        }
+        base = self._base_row(
+            {
+                "Invoice Number": order.get("order_id", ""),
+                "SONumber": order.get("purchase_order_number", ""),
+                "Date": self._normalize_date(order.get("ship_date", "")),
+                "Customer": "auto_accessories_garage",
+                "CarrierName": "FEDEX_GROUND",
+                "TrackingNumber": order.get("tracking_number", ""),
+            }
+        )
+        slots = self._slots("item", "qty", "price")
 
         items = order.get("items", []) or []
         n_items = max(len(items), 1)
@@ -106,34 +157,51 @@ class DfCreator:
             price_each = self._fallback_item_price(order, n_items, unit_cost)
             # keep 3 decimals
             line_price = float(f"{price_each * max(qty,1):.3f}")
-            self._rows.append({**base, "item": sku, "qty": qty, "price": line_price})
+            self._rows.append(self._fill(base, slots, (sku, qty, line_price)))
 
         # Taxes and Shipping lines
         self._rows.append(
-            {**base, "item": "Taxes", "qty": 1, "price": float(order.get("tax") or 0.0)}
+            self._fill(base, slots, ("Taxes", 1, float(order.get("tax") or 0.0)))
         )
         self._rows.append(
-            {
-                **base,
-                "item": "SHIPPING",
-                "qty": 1,
-                "price": float(order.get("shipping") or 0.0),
-            }
+            self._fill(
+                base, slots, ("SHIPPING", 1, float(order.get("shipping") or 0.0))
+            )
         )
 
-    # inside class DfCreator
+    # -------- Row helpers --------
+    def _base_row(self, fields: Dict[str, Any]) -> List[Any]:
+        """Blank row in header order with `fields` filled in; columns not in the
+        format's headers are dropped."""
+        row: List[Any] = [""] * len(self._cols)
+        for col, value in fields.items():
+            i = self._col_index.get(col)
+            if i is not None:
+                row[i] = value
+        return row
+
+    def _slots(self, *cols: str) -> List[Optional[int]]:
+        return [self._col_index.get(c) for c in cols]
+
+    @staticmethod
+    def _fill(
+        base: List[Any], slots: List[Optional[int]], values: Tuple[Any, ...]
+    ) -> List[Any]:
+        row = base.copy()
+        for i, v in zip(slots, values):
+            if i is not None:
+                row[i] = v
+        return row
 
     def _normalize_date(self, value: object) -> str:
         """
         Return date in 'YYYY/MM/DD' as required by AAG.
         Accepts:
-        - str already in YYYY/MM/DD (returned as-is)
+        - str already in YYYY/MM/DD (zero-padded if needed)
         - str like '7/7/2025' or '07/07/2025'
         - datetime/date objects
         Falls back to str(value) if parsing fails.
         """
-        from datetime import datetime, date
-
         if value is None:
             return ""
         # If it's already a date/datetime
@@ -141,26 +209,21 @@ class DfCreator:
             return value.strftime("%Y/%m/%d")
 
         s = str(value).strip()
-        # Already the desired format?
-        try:
-            # quick check: parse as desired format
-            dt = datetime.strptime(s, "%Y/%m/%d")
-            return dt.strftime("%Y/%m/%d")
-        except Exception:
-            pass
-
-        # Try common m/d/Y formats
-        for fmt in ("%m/%d/%Y", "%-m/%-d/%Y", "%m/%-d/%Y", "%-m/%d/%Y"):
+        m = _YMD.match(s)
+        if m:
+            y, mo, d = m.groups()
+        else:
+            m = _MDY.match(s)
+            if m:
+                mo, d, y = m.groups()
+        if m:
             try:
-                dt = datetime.strptime(s, fmt)
-                return dt.strftime("%Y/%m/%d")
-            except Exception:
-                continue
+                return date(int(y), int(mo), int(d)).strftime("%Y/%m/%d")
+            except ValueError:
+                pass  # e.g. 2025/13/40 -> let pandas have a go
 
         # Last resort: try pandas to_datetime
         try:
-            import pandas as pd
-
             dt = pd.to_datetime(s, errors="raise")
             return dt.strftime("%Y/%m/%d")
         except Exception:
@@ -184,26 +247,31 @@ class DfCreator:
 
     def _safe_round(self, value: Any) -> Any:
         try:
+            if type(value) is float:
+                return round_money_fast(value)
             return round_to_decimal(value)
         except Exception:
             return value
 
     # -------- Legacy helper used by order_invoice_matcher_test.py --------
     def _order_invoice_matcher(self, order: Dict[str, Any], invoice) -> Dict[str, Any]:
+        _ga = getattr
         order_items = {}
-        order["subtotal"] = getattr(invoice, "TotalAmt", order.get("subtotal", 0))
-        for line in getattr(invoice, "Line", []) or []:
-            if getattr(line, "Description", "") == "Shipping":
-                order["shipping"] = line.Amount
-            elif getattr(line, "Description", "") == "Taxes":
-                order["tax"] = line.Amount
-            elif getattr(line, "DetailType", "") == "SalesItemLineDetail":
-                order_items[getattr(line, "Description", "")] = line.Amount
-        for i in range(len(order.get("items", []))):
-            sku, quantity, unit_cost = (
-                order["items"][i]
-                if len(order["items"][i]) == 3
-                else (*order["items"][i], 0)
-            )
-            order["items"][i] = (sku, quantity, order_items.get(sku, unit_cost))
+        order["subtotal"] = _ga(invoice, "TotalAmt", order.get("subtotal", 0))
+        # Description -> order field for the single-amount lines
+        amount_fields = {"Shipping": "shipping", "Taxes": "tax"}
+        for line in _ga(invoice, "Line", []) or []:
+            desc = _ga(line, "Description", "")
+            field = amount_fields.get(desc)
+            if field:
+                order[field] = line.Amount
+            elif _ga(line, "DetailType", "") == "SalesItemLineDetail":
+                order_items[desc] = line.Amount
+        # Update the list in place so callers holding it see the new unit costs
+        items = order.get("items")
+        if items:
+            items[:] = [
+                (sku, quantity, order_items.get(sku, rest[0] if rest else 0))
+                for sku, quantity, *rest in items
+            ]
         return order
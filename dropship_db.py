@@ -1,35 +1,84 @@
 # dropship_db.py
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List, Optional, Tuple
+from itertools import groupby
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
 import pyodbc
 from config import db_config, create_connection_string
 
 DropshipperKey = Tuple[str, str]  # (dropshipper_code, ftp_folder_name)
 
+# Used when the fileformats tables can't be read (e.g. test DBs)
+_FALLBACK_INVOICE_CSV_HEADERS: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+    {
+        "default": (
+            "po_number",
+            "invoice_number",
+            "invoice_date",
+            "invoice_total_amount",
+            "invoice_subtotal_amount",
+            "invoice_tax_amount",
+            "line_item_sku",
+            "line_item_quantity",
+            "line_item_unit_cost",
+        ),
+        "aag": (
+            "Invoice Number",
+            "SONumber",
+            "Date",
+            "Customer",
+            "CarrierName",
+            "TrackingNumber",
+            "item",
+            "qty",
+            "price",
+        ),
+    }
+)
+
+# Where the QuickBooks invoice id may live, in order of preference
+_INVOICE_ID_COLUMN_CANDIDATES: List[Tuple[str, str]] = [
+    ("dbo.PurchaseOrders", "quickbooks_invoice_id"),
+    ("dbo.PurchaseOrders", "qb_invoice_id"),
+    ("dbo.PurchaseOrders", "invoice_id"),
+]
+
 
 class DropshipDb:
     """
     Minimal DB wrapper for the dropship invoicing pipeline.
     - Connects using 'DropshipSellerCloudTest' profile.
-    - Uses a SINGLE query (with FOR JSON PATH) to fetch orders + items.
+    - Uses a SINGLE query (orders LEFT JOIN items) to fetch orders + items.
     """
 
+    FETCH_BATCH_SIZE = 1000
+
     def __init__(self) -> None:
         self.connection_string = create_connection_string(
             db_config["DropshipSellerCloudTest"]
         )
-        self.connection = pyodbc.connect(self.connection_string)
+        # Autocommit: reads don't need an implicit transaction and the
+        # invoice-id updates are independent single-statement writes.
+        self.connection = pyodbc.connect(self.connection_string, autocommit=True)
         self.cursor = self.connection.cursor()
+        self.cursor.arraysize = self.FETCH_BATCH_SIZE
+        self.cursor.fast_executemany = True
+        self._headers_cache: Optional[Mapping[str, Tuple[str, ...]]] = None
+        self._invoice_id_column: Optional[Tuple[str, str]] = None
+        self._invoice_id_column_checked = False
 
     # --------------------------------------------------------------------- #
     # CSV headers
     # --------------------------------------------------------------------- #
-    def get_invoice_csv_headers(self) -> Dict[str, List[str]]:
+    def get_invoice_csv_headers(self) -> Mapping[str, Tuple[str, ...]]:
         """
-        Returns {file_format_name: [header, ...]} for invoice CSVs.
+        Returns {file_format_name: (header, ...)} for invoice CSVs.
+        Cached per instance and read-only, since every report shares it.
         """
+        if self._headers_cache is not None:
+            return self._headers_cache
+
         sql = """
             SELECT 
                 f.name AS file_format_name,
@@ -44,39 +93,23 @@ class DropshipDb:
             self.cursor.execute(sql)
             rows = self.cursor.fetchall()
             if rows:
-                return {r.file_format_name: r.header_names.split(", ") for r in rows}
+                self._headers_cache = MappingProxyType(
+                    {
+                        r.file_format_name: tuple(r.header_names.split(", "))
+                        for r in rows
+                    }
+                )
+                return self._headers_cache
         except Exception:
             pass
 
         # Safe fallback so tests don't crash
         print("[DropshipDb] get_invoice_csv_headers: using fallback headers.")
-        return {
-            "default": [
-                "po_number",
-                "invoice_number",
-                "invoice_date",
-                "invoice_total_amount",
-                "invoice_subtotal_amount",
-                "invoice_tax_amount",
-                "line_item_sku",
-                "line_item_quantity",
-                "line_item_unit_cost",
-            ],
-            "aag": [
-                "Invoice Number",
-                "SONumber",
-                "Date",
-                "Customer",
-                "CarrierName",
-                "TrackingNumber",
-                "item",
-                "qty",
-                "price",
-            ],
-        }
+        self._headers_cache = _FALLBACK_INVOICE_CSV_HEADERS
+        return self._headers_cache
 
     # --------------------------------------------------------------------- #
-    # ONE-QUERY fetch for orders ready to invoice (orders + items inline)
+    # ONE-QUERY fetch for orders ready to invoice (orders joined to items)
     # --------------------------------------------------------------------- #
     def get_invoice_ready_orders(
         self,
@@ -112,79 +145,58 @@ class DropshipDb:
                 d.name,
                 d.ftp_folder_name,
                 ff.name AS file_format_name,
-                (
-                    SELECT poi.sku, poi.quantity
-                    FROM dbo.PurchaseOrderItems AS poi
-                    WHERE poi.purchase_order_id = po.id
-                    ORDER BY poi.id
-                    FOR JSON PATH
-                ) AS items_json
+                poi.id AS item_id,
+                poi.sku,
+                poi.quantity
             FROM dbo.PurchaseOrders AS po
             JOIN dbo.Dropshippers          AS d   ON po.dropshipper_id = d.id
             JOIN dbo.States                AS s   ON po.state        = s.id
             JOIN dbo.Countries             AS c   ON po.country      = c.id
             JOIN dbo.DropshipperFileFormats AS dff ON dff.dropshipper_id = d.id
             JOIN dbo.FileFormats           AS ff  ON ff.id = dff.format_id
+            LEFT JOIN dbo.PurchaseOrderItems AS poi ON poi.purchase_order_id = po.id
             WHERE po.tracking_number IS NOT NULL
             AND ff.type = 'invoice'
             AND po.is_invoiced = 0
             AND d.code != 'ABS'
             {po_filter}
-            ORDER BY po.id;
+            ORDER BY po.id, ff.name, poi.id;
         """
 
-        params: List[Any] = []
+        # Only two possible SQL texts, so SQL Server keeps reusing their plans
+        # no matter how many report_orders are passed.
         po_filter = ""
         if report_orders:
-            placeholders = ", ".join("?" * len(report_orders))
-            po_filter = f" AND po.purchase_order_number IN ({placeholders})"
-            params.extend(report_orders)
+            po_filter = (
+                " AND po.purchase_order_number IN "
+                "(SELECT purchase_order_number FROM #report_orders)"
+            )
 
         sql = base_sql.format(po_filter=po_filter)
 
         try:
-            self.cursor.execute(sql, params) if params else self.cursor.execute(sql)
-            rows = self.cursor.fetchall()
+            if report_orders:
+                self._stage_report_orders(report_orders)
+            self.cursor.execute(sql)
         except Exception as e:
             raise RuntimeError(f"Query for invoice-ready orders failed: {e}")
 
         result: Dict[DropshipperKey, Dict[str, Any]] = {}
-        for row in rows:
-            # Items as JSON → list of dicts
-            items_raw_json = getattr(row, "items_json", None) or "[]"
-            try:
-                items_raw = json.loads(items_raw_json)
-            except Exception:
-                items_raw = []
-
+        # One row per item (or a single item-less row); rows arrive ordered so
+        # each PO/file-format pair is contiguous.
+        for _, group in groupby(
+            self._iter_rows(), key=lambda r: (r.id, r.file_format_name)
+        ):
+            group_rows = list(group)
+            row = group_rows[0]
             items = [
-                (itm.get("sku"), int(itm.get("quantity") or 0), 0.0)
-                for itm in items_raw
+                (r.sku, int(r.quantity or 0), 0.0)
+                for r in group_rows
+                if r.item_id is not None
             ]
 
             ds_key: DropshipperKey = (row.code, row.ftp_folder_name)
-            order = {
-                "items": items,
-                "purchase_order_number": row.purchase_order_number,
-                "sellercloud_order_id": row.sellercloud_order_id,
-                "tax": "",
-                "shipping": float(row.shipping_cost or 0),
-                "subtotal": "",
-                "code": row.code,
-                "tracking_number": row.tracking_number,
-                "ship_date": (
-                    row.tracking_date.strftime("%Y/%m/%d") if row.tracking_date else ""
-                ),
-                "city": row.city,
-                "state": row.state,
-                "country": row.country,
-                "postal_code": row.zip,
-                "address": row.address,
-                "dropshipper_name": row.name,
-            }
-            order["order_id"] = self._ensure_order_id(
-                row.code, row.purchase_order_number
-            )
+            order = self._row_to_order(row, items)
 
             if ds_key in result:
                 result[ds_key]["orders"].append(order)
@@ -200,16 +212,69 @@ class DropshipDb:
     # --------------------------------------------------------------------- #
     # Helpers
     # --------------------------------------------------------------------- #
+    def _iter_rows(self) -> Iterator[pyodbc.Row]:
+        """Yield rows from the last execute in fetchmany batches (bounded memory)."""
+        while True:
+            try:
+                batch = self.cursor.fetchmany(self.FETCH_BATCH_SIZE)
+            except Exception as e:
+                raise RuntimeError(f"Query for invoice-ready orders failed: {e}")
+            if not batch:
+                return
+            yield from batch
+
+    def _stage_report_orders(self, report_orders: List[str]) -> None:
+        """Load PO numbers into the session temp table #report_orders."""
+        self.cursor.execute(
+            """
+            IF OBJECT_ID('tempdb..#report_orders') IS NOT NULL DROP TABLE #report_orders;
+            CREATE TABLE #report_orders (purchase_order_number NVARCHAR(128) PRIMARY KEY);
+            """
+        )
+        # fast_executemany can't describe parameters of a temp table; declare them
+        self.cursor.setinputsizes([(pyodbc.SQL_WVARCHAR, 128, 0)])
+        try:
+            self.cursor.executemany(
+                "INSERT INTO #report_orders (purchase_order_number) VALUES (?)",
+                [(po,) for po in dict.fromkeys(report_orders)],
+            )
+        finally:
+            self.cursor.setinputsizes(None)
+
+    def _row_to_order(
+        self, row: pyodbc.Row, items: List[Tuple[str, int, float]]
+    ) -> Dict[str, Any]:
+        order = {
+            "items": items,
+            "purchase_order_number": row.purchase_order_number,
+            "sellercloud_order_id": row.sellercloud_order_id,
+            "tax": "",
+            "shipping": float(row.shipping_cost or 0),
+            "subtotal": "",
+            "code": row.code,
+            "tracking_number": row.tracking_number,
+            "ship_date": (
+                row.tracking_date.strftime("%Y/%m/%d") if row.tracking_date else ""
+            ),
+            "city": row.city,
+            "state": row.state,
+            "country": row.country,
+            "postal_code": row.zip,
+            "address": row.address,
+            "dropshipper_name": row.name,
+        }
+        order["order_id"] = self._ensure_order_id(row.code, row.purchase_order_number)
+        return order
+
     @staticmethod
     def _ensure_order_id(code: str, purchase_order_number: str) -> str:
         """Ensure the dropshipper code prefixes the PO number."""
-        code_len = len(code or "")
-        if purchase_order_number[:code_len] == code:
+        if purchase_order_number.startswith(code or ""):
             return purchase_order_number
         return f"{code}{purchase_order_number}"
 
     # --------------------------------------------------------------------- #
-    # Optional write helper
+    # Optional write helpers
     # --------------------------------------------------------------------- #
     def save_invoice_id(self, purchase_order_number: str, invoice_id: str) -> None:
         """
@@ -219,29 +284,92 @@ class DropshipDb:
         if not purchase_order_number or not invoice_id:
             print("[save_invoice_id] Missing PO or invoice_id; skipping.")
             return
+        self.save_invoice_ids([(purchase_order_number, invoice_id)])
+
+    def save_invoice_ids(self, pairs: List[Tuple[str, str]]) -> None:
+        """
+        Batched save_invoice_id: pairs are (purchase_order_number, invoice_id).
+        The target column is discovered once per instance, then all rows go out
+        in a single executemany.
+        """
+        params = [(iid, po) for po, iid in pairs if po and iid]
+        if not params:
+            return
 
-        candidates = [
-            ("dbo.PurchaseOrders", "quickbooks_invoice_id"),
-            ("dbo.PurchaseOrders", "qb_invoice_id"),
-            ("dbo.PurchaseOrders", "invoice_id"),
-        ]
+        target = self._discover_invoice_id_column()
+        if not target:
+            print(
+                "[save_invoice_id] WARNING: Could not persist invoice_id in this DB (table/column not found). Skipping."
+            )
+            return
 
-        for table, col in candidates:
-            try:
-                sql = f"UPDATE {table} SET {col} = ? WHERE purchase_order_number = ?"
-                self.cursor.execute(sql, (invoice_id, purchase_order_number))
-                if self.cursor.rowcount and self.cursor.rowcount > 0:
-                    self.connection.commit()
-                    print(
-                        f"[save_invoice_id] Saved invoice_id to {table}.{col} for PO={purchase_order_number}"
-                    )
-                    return
-            except Exception:
-                continue
-
-        print(
-            "[save_invoice_id] WARNING: Could not persist invoice_id in this DB (table/column not found). Skipping."
-        )
+        table, col = target
+        sql = f"UPDATE {table} SET {col} = ? WHERE purchase_order_number = ?"
+        try:
+            self.cursor.executemany(sql, params)
+        except Exception as e:
+            print(f"[save_invoice_id] WARNING: Batch update failed: {e}")
+            return
+
+        # rowcount isn't reliable after a fast_executemany batch; count the
+        # PO numbers that actually exist so a PO matching nothing isn't "saved".
+        po_numbers = list(dict.fromkeys(po for _, po in params))
+        matched = self._count_existing_pos(table, po_numbers)
+        if matched is None:
+            print(
+                f"[save_invoice_id] Sent {len(params)} invoice_id update(s) to {table}.{col}; could not verify matches."
+            )
+            return
+        if matched:
+            print(f"[save_invoice_id] Saved {matched} invoice_id(s) to {table}.{col}")
+        if matched < len(po_numbers):
+            print(
+                f"[save_invoice_id] WARNING: {len(po_numbers) - matched} PO(s) matched no row in {table}."
+            )
+
+    def _count_existing_pos(self, table: str, po_numbers: List[str]) -> Optional[int]:
+        """How many of `po_numbers` exist in `table`; None if the query fails.
+        Joins against the #report_orders staging so the SQL text never varies."""
+        try:
+            self._stage_report_orders(po_numbers)
+            self.cursor.execute(
+                f"""
+                SELECT COUNT(DISTINCT t.purchase_order_number)
+                FROM {table} AS t
+                JOIN #report_orders AS r
+                    ON r.purchase_order_number = t.purchase_order_number
+                """
+            )
+            return self.cursor.fetchone()[0]
+        except Exception:
+            return None
+
+    def _discover_invoice_id_column(self) -> Optional[Tuple[str, str]]:
+        """Return (table, column) for the invoice id, checking sys.columns once."""
+        if self._invoice_id_column_checked:
+            return self._invoice_id_column
+        self._invoice_id_column_checked = True
+
+        names = [col for _, col in _INVOICE_ID_COLUMN_CANDIDATES]
+        placeholders = ", ".join("?" * len(names))
+        sql = f"""
+            SELECT name
+            FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.PurchaseOrders')
+            AND name IN ({placeholders})
+        """
+        try:
+            self.cursor.execute(sql, names)
+            found = {r.name for r in self.cursor.fetchall()}
+        except Exception:
+            found = set()
+
+        # Keep the original preference order when several columns exist
+        for table, col in _INVOICE_ID_COLUMN_CANDIDATES:
+            if col in found:
+                self._invoice_id_column = (table, col)
+                break
+        return self._invoice_id_column
 
     # --------------------------------------------------------------------- #
     # Lifecycle
@@ -1,23 +1,54 @@
 # email_helper.py
 from __future__ import annotations
+from functools import lru_cache
+from html import escape
 from typing import Dict, List, Iterable, Optional
 from kramer_functions import GmailNotifier, AzureSecrets
 
+_HTML_TEMPLATE = "<pre>\n{}</pre>"  # monospaced, same layout as the text body
+
+
+# Process-wide singletons: Key Vault auth and Gmail setup are paid once per run
+@lru_cache(maxsize=1)
+def _get_secrets() -> AzureSecrets:
+    return AzureSecrets()
+
+
+@lru_cache(maxsize=1)
+def _get_notifier() -> GmailNotifier:
+    return GmailNotifier()
+
+
+@lru_cache(maxsize=1)
+def _get_it_email() -> Optional[str]:
+    """IT department address from Key Vault; fetched once per process."""
+    try:
+        return _get_secrets().get_secret("email-address-it-department", required=False)
+    except Exception:
+        return None
+
 
 class EmailHelper:
     """
     Thin wrapper over Kramer Functions GmailNotifier.
     - Optional test_recipient to force all emails to go to a single address (safe testing).
-    - Fallback default recipient (IT) from Azure Key Vault (secret: 'email-address-it-department').
+    - Fallback default recipient (IT) from Azure Key Vault (secret: 'email-address-it-department'),
+      looked up on first use and cached for the whole process.
+    - GmailNotifier/AzureSecrets are process-wide and only created when first needed.
     - send_error_report() to format the classic invoice error summary.
     """
 
     def __init__(self, test_recipient: Optional[str] = None) -> None:
-        self.notifier = GmailNotifier()
-        self.secrets = AzureSecrets()
-        self.default_it_email = self._get_secret_safe("email-address-it-department")
         self.test_recipient = test_recipient  # e.g., "rghanti@krameramerica.com"
 
+    @property
+    def notifier(self) -> GmailNotifier:
+        return _get_notifier()
+
+    @property
+    def default_it_email(self) -> Optional[str]:
+        return _get_it_email()
+
     def send_error_report(
         self,
         orders_unable_to_invoice: Optional[Dict[str, List[str]]] = None,
@@ -27,34 +58,42 @@ class EmailHelper:
         subject: str = "Dropshipper Invoice Error Report",
     ) -> None:
         """Build and send the classic error report (monospaced)."""
-        lines: List[str] = []
+        to_list = self._resolve_recipients(recipients)
+        if not to_list:
+            return  # nothing to send; skip building the report entirely
 
-        if orders_unable_to_invoice:
-            lines.append("There was an Error when trying to invoice these orders:")
-            for code, orders in orders_unable_to_invoice.items():
-                lines.append(f"  {code}:")
-                for po in orders or []:
-                    lines.append(f"    {po}")
-            lines.append("")
+        # Plain-text and HTML lines are built together in one pass; only the
+        # HTML side is escaped (PO numbers/codes come from partner data).
+        lines: List[str] = []
+        html_lines: List[str] = []
 
-        if orders_already_invoiced:
-            lines.append("These orders were previously invoiced:")
-            for code, orders in orders_already_invoiced.items():
+        sections = (
+            (
+                "There was an Error when trying to invoice these orders:",
+                orders_unable_to_invoice,
+            ),
+            ("These orders were previously invoiced:", orders_already_invoiced),
+        )
+        for title, section in sections:
+            if not section:
+                continue
+            lines.append(title)
+            html_lines.append(title)
+            for code, orders in section.items():
                 lines.append(f"  {code}:")
+                html_lines.append(f"  {escape(str(code))}:")
                 for po in orders or []:
                     lines.append(f"    {po}")
+                    html_lines.append(f"    {escape(str(po))}")
             lines.append("")
+            html_lines.append("")
 
         if not lines:
-            lines = ["No errors to report."]
+            lines = html_lines = ["No errors to report."]
 
-        html = "<pre>\n" + "\n".join(lines) + "</pre>"
+        html = _HTML_TEMPLATE.format("\n".join(html_lines))
         body = "\n".join(lines)
 
-        to_list = self._resolve_recipients(recipients)
-        if not to_list:
-            return  # nothing to send
-
         self.notifier.send_notification(
             subject=subject,
             body=body,
@@ -74,11 +113,21 @@ class EmailHelper:
             return list(recipients)
         return [self.default_it_email] if self.default_it_email else []
 
-    def _get_secret_safe(self, name: str) -> Optional[str]:
-        try:
-            return self.secrets.get_secret(name, required=False)
-        except Exception:
-            return None
+
+@lru_cache(maxsize=1)
+def _default_emailer() -> EmailHelper:
+    return EmailHelper()
+
+
+def send_error_report(
+    orders_unable_to_invoice: Optional[Dict[str, List[str]]] = None,
+    orders_already_invoiced: Optional[Dict[str, List[str]]] = None,
+    **kwargs,
+) -> None:
+    """Module-level shortcut; reuses one EmailHelper for the whole process."""
+    return _default_emailer().send_error_report(
+        orders_unable_to_invoice, orders_already_invoiced, **kwargs
+    )
 
 
-__all__ = ["EmailHelper"]
+__all__ = ["EmailHelper", "send_error_report"]
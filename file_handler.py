@@ -11,6 +11,8 @@ class FileHandler:
 
     def __init__(self, report_date: datetime):
         self.report_date = report_date
+        # ftp_folder_name -> created directory; one makedirs per folder per run
+        self._dir_cache: dict[str, str] = {}
 
     def save_data_to_file(self, invoice_data_df, ftp_folder_name: str):
         if invoice_data_df.empty:
@@ -21,10 +23,32 @@ class FileHandler:
         invoice_data_df.to_csv(file_path, index=False)
         return file_path
 
+    def save_bytes_to_file(
+        self, csv_bytes: bytes, ftp_folder_name: str, file_tag: str | None = None
+    ):
+        """
+        Same layout as save_data_to_file, for CSV content that is already encoded.
+        `file_tag` is appended to the file name (Invoice_<date>_<tag>.csv) when
+        several files share one folder in a run, so they don't overwrite each other.
+        """
+        if not csv_bytes:
+            return False
+        directory_path = self._create_directory_structure(ftp_folder_name)
+        date_str = self.report_date.strftime(self.DATE_FORMAT)
+        name = f"Invoice_{date_str}_{file_tag}" if file_tag else f"Invoice_{date_str}"
+        file_path = os.path.join(directory_path, f"{name}.csv")
+        with open(file_path, "wb") as fh:
+            fh.write(csv_bytes)
+        return file_path
+
     def _create_directory_structure(self, ftp_folder_name: str) -> str:
+        cached = self._dir_cache.get(ftp_folder_name)
+        if cached:
+            return cached
         datetime_str = self.report_date.strftime(
             f"{self.DATE_FORMAT}_{self.TIME_FORMAT}"
         )
         dir_path = os.path.join(self.BASE_DIRECTORY, ftp_folder_name, datetime_str)
         os.makedirs(dir_path, exist_ok=True)
+        self._dir_cache[ftp_folder_name] = dir_path
         return dir_path
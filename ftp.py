@@ -1,6 +1,10 @@
 # ftp.py
 from __future__ import annotations
+import logging
 import os
+import queue
+from pathlib import PureWindowsPath
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 from kramer_functions import FTPFileManager
 
@@ -15,12 +19,22 @@ FTP uploader for invoice CSVs using Kramer Functions.
 - Supports TEST mode:
     - Set INVOICE_TEST_MODE=1 to force uploads into "test_customer" folder
 - Supports DRY RUN:
-    - Set DRY_RUN=1 to print intended uploads without touching the network
+    - Set DRY_RUN=1 to log intended uploads without touching the network
+- Logs through the "ftp" logger; set FTP_LOG_LEVEL (default INFO) to change verbosity
+- A small pool of FTP sessions (default 2, one per mirror) is reused for every
+  upload; use it as a context manager (`with FTPManager() as ftp: ...`) or call
+  close() when done.
 
 You can also call this file as a script to run a quick self-test (see bottom).
 """
 
 
+logger = logging.getLogger("ftp")
+# Unknown names (e.g. "verbose") fall back to INFO instead of failing the import
+_level = logging.getLevelName(os.getenv("FTP_LOG_LEVEL", "INFO").strip().upper())
+logger.setLevel(_level if isinstance(_level, int) else logging.INFO)
+
+
 def _bool_env(name: str, default: bool = False) -> bool:
     v = os.getenv(name)
     if v is None:
@@ -29,19 +43,35 @@ def _bool_env(name: str, default: bool = False) -> bool:
 
 
 class FTPManager:
-    def __init__(self) -> None:
+    # Mirrored destinations per business rules (see _build_remote_paths)
+    REMOTE_PATH_TEMPLATES = (
+        "/dropshipper_logs/invoice_logs/{ftp_folder}/{filename}",
+        "/dropshipper/{ftp_folder}/invoices/{filename}",
+    )
+
+    def __init__(self, pool_size: int = 2) -> None:
         """
         We rely on Kramer FTPFileManager to resolve credentials.
         If creds are missing or invalid, constructor or upload will raise;
         we catch and log in upload_files to avoid crashing test runs.
+        Up to `pool_size` sessions are opened on first upload (one per mirrored
+        destination by default) and kept until close().
         """
         # Lazily instantiate in upload_files so test runs with DRY_RUN don’t require creds.
-        self._ftp: FTPFileManager | None = None
+        self.pool_size = max(1, pool_size)
+        self._clients: List[FTPFileManager] = []
+        self._pool: "queue.Queue[FTPFileManager]" = queue.Queue()
 
         # Behavior flags (can be overridden per-call)
         self.default_test_mode = _bool_env("INVOICE_TEST_MODE", False)
         self.default_dry_run = _bool_env("DRY_RUN", False)
 
+    def __enter__(self) -> "FTPManager":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
     # ------------------------- public API -------------------------
 
     def upload_files(
@@ -53,26 +83,23 @@ class FTPManager:
     ) -> None:
         """
         Upload local files to two remote destinations per file.
+        Every (file, destination) pair is uploaded concurrently over the session pool.
         If test_mode=True (or INVOICE_TEST_MODE=1), forces ftp_folder to 'test_customer'.
-        If dry_run=True (or DRY_RUN=1), prints what would happen and exits without network calls.
+        If dry_run=True (or DRY_RUN=1), logs what would happen and exits without network calls.
         """
         if not all_paths:
-            print("[FTP] No files to upload.")
+            logger.info("[FTP] No files to upload.")
             return
 
         test_mode = self.default_test_mode if test_mode is None else test_mode
         dry_run = self.default_dry_run if dry_run is None else dry_run
 
-        # Prepare (maybe) the FTP client only if we will actually upload
-        if not dry_run and self._ftp is None:
-            try:
-                self._ftp = FTPFileManager()
-            except Exception as e:
-                # Don’t hard-fail; allow tests to proceed without network
-                print(f"[FTP] Unable to initialize FTP client: {e}")
-                print("[FTP] Falling back to DRY RUN behavior for this call.")
-                dry_run = True
+        # Prepare (maybe) the FTP clients only if we will actually upload
+        if not dry_run and not self._open_pool():
+            logger.warning("[FTP] Falling back to DRY RUN behavior for this call.")
+            dry_run = True
 
+        jobs: List[Tuple[str, List[str]]] = []
         for path in all_paths:
             ftp_folder, filename = self._path_decomposer(path)
             if test_mode:
@@ -81,29 +108,64 @@ class FTPManager:
             remote_paths = self._build_remote_paths(ftp_folder, filename)
 
             if dry_run:
-                print(f"[FTP:DRY_RUN] Would upload '{path}' to:")
-                for rp in remote_paths:
-                    print(f"  - {rp}")
+                logger.info(
+                    "[FTP:DRY_RUN] Would upload '%s' to:\n%s",
+                    path,
+                    "\n".join(f"  - {rp}" for rp in remote_paths),
+                )
                 continue
+            jobs.append((path, remote_paths))
 
-            # Real upload
+        if not jobs:
+            return
+
+        # Real upload
+        with ThreadPoolExecutor(max_workers=len(self._clients)) as ex:
+            submitted = [
+                (path, [ex.submit(self._upload_one, path, rp) for rp in remote_paths])
+                for path, remote_paths in jobs
+            ]
+            for path, futures in submitted:
+                errors = [f.exception() for f in futures if f.exception()]
+                if errors:
+                    # Log and continue with other files
+                    logger.error("[FTP] Error uploading '%s': %s", path, errors[0])
+                else:
+                    logger.info(
+                        "[FTP] Uploaded '%s' to %d destinations.", path, len(futures)
+                    )
+
+    def close(self) -> None:
+        """Close every FTP session that was opened."""
+        for client in self._clients:
             try:
-                assert self._ftp is not None, "FTP client not initialized"
-                for rp in remote_paths:
-                    self._ftp.upload_file(path, rp)
-                print(f"[FTP] Uploaded '{path}' to {len(remote_paths)} destinations.")
-            except Exception as e:
-                # Log and continue with other files
-                print(f"[FTP] Error uploading '{path}': {e}")
+                client.close()
+            except Exception:
+                pass
+        self._clients = []
+        self._pool = queue.Queue()
+
+    # ------------------------- pool -------------------------
 
-        # Close the session if we opened it
+    def _open_pool(self) -> bool:
+        """Open up to pool_size sessions; True if at least one is available."""
+        while len(self._clients) < self.pool_size:
+            try:
+                client = FTPFileManager()
+            except Exception as e:
+                # Don’t hard-fail; allow tests to proceed without network
+                logger.warning("[FTP] Unable to initialize FTP client: %s", e)
+                break
+            self._clients.append(client)
+            self._pool.put(client)
+        return bool(self._clients)
+
+    def _upload_one(self, path: str, remote_path: str) -> None:
+        client = self._pool.get()
         try:
-            if self._ftp is not None:
-                self._ftp.close()
-        except Exception:
-            pass
+            client.upload_file(path, remote_path)
         finally:
-            self._ftp = None
+            self._pool.put(client)
 
     # ------------------------- helpers -------------------------
 
@@ -112,20 +174,23 @@ class FTPManager:
         Expect local files under tmp/<ftp_folder>/<timestamp>/<filename>.
         Returns (ftp_folder, filename). Gracefully handles unexpected shapes.
         """
-        norm = local_path.replace("\\", "/")
-        parts = norm.split("/")
+        # PureWindowsPath splits on both "\\" and "/" regardless of the host OS
+        path = PureWindowsPath(local_path)
+        parts = path.parts
 
-        filename = parts[-1] if parts else os.path.basename(local_path)
+        filename = path.name or os.path.basename(local_path)
 
         # Prefer second element after 'tmp' if present
         ftp_folder = "unknown"
-        if "tmp" in parts:
+        try:
             idx = parts.index("tmp")
+        except ValueError:
+            if len(parts) > 1:
+                # Fallback: second segment of path
+                ftp_folder = parts[1]
+        else:
             if idx + 1 < len(parts):
                 ftp_folder = parts[idx + 1]
-        elif len(parts) > 1:
-            # Fallback: second segment of path
-            ftp_folder = parts[1]
 
         return ftp_folder, filename
 
@@ -135,8 +200,8 @@ class FTPManager:
         Absolute paths are preferred by most FTP servers; keep leading slash.
         """
         return [
-            f"/dropshipper_logs/invoice_logs/{ftp_folder}/{filename}",
-            f"/dropshipper/{ftp_folder}/invoices/{filename}",
+            t.format(ftp_folder=ftp_folder, filename=filename)
+            for t in self.REMOTE_PATH_TEMPLATES
         ]
 
 
@@ -153,6 +218,7 @@ if __name__ == "__main__":
       $env:INVOICE_TEST_MODE = "1"
       python ftp.py
     """
+    logging.basicConfig(format="%(message)s")
     dummy_dir = os.path.join("tmp", "my_partner", "20250101_000000")
     os.makedirs(dummy_dir, exist_ok=True)
     dummy_file = os.path.join(dummy_dir, "Invoice_01012025.csv")
@@ -160,5 +226,5 @@ if __name__ == "__main__":
         with open(dummy_file, "w", encoding="utf-8") as fh:
             fh.write("col1,col2\nval1,val2\n")
 
-    fm = FTPManager()
-    fm.upload_files([dummy_file])  # honors DRY_RUN and INVOICE_TEST_MODE env vars
+    with FTPManager() as fm:
+        fm.upload_files([dummy_file])  # honors DRY_RUN and INVOICE_TEST_MODE env vars
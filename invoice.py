@@ -2,12 +2,15 @@
 # invoice.py (refactored)
 # =============================
 from __future__ import annotations
+import json
 from datetime import datetime
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
 
 from config import client_secret, qBData
 from intuitlib.client import AuthClient
 from quickbooks import QuickBooks
+from quickbooks.batch import batch_create
 from quickbooks.objects import (
     Invoice,
     SalesItemLineDetail,
@@ -23,11 +26,25 @@ from quickbooks.objects.base import Ref, Address, EmailAddress
 # -------- Helpers --------
 
 
+_DATE_FORMATS = ("%Y/%m/%d", "%Y-%m-%d", "%m/%d/%Y")
+
+
+@lru_cache(maxsize=4096)
 def _normalize_date(d: str) -> str:
-    """Accepts 'YYYY/MM/DD', 'YYYY-MM-DD', or '%m/%d/%Y' and returns 'YYYY-MM-DD'."""
+    """Accepts 'YYYY/MM/DD', 'YYYY-MM-DD', or '%m/%d/%Y' and returns 'YYYY-MM-DD'.
+    Cached: a run only sees a handful of distinct ship dates."""
     if not d:
         return ""
-    for fmt in ("%Y/%m/%d", "%Y-%m-%d", "%m/%d/%Y"):
+    # Pick the likely format from the 5th char so the common case is one strptime
+    if len(d) > 4 and d[:4].isdigit() and d[4] in "/-":
+        guess = "%Y/%m/%d" if d[4] == "/" else "%Y-%m-%d"
+    else:
+        guess = "%m/%d/%Y"
+    try:
+        return datetime.strptime(d, guess).strftime("%Y-%m-%d")
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
         try:
             return datetime.strptime(d, fmt).strftime("%Y-%m-%d")
         except ValueError:
@@ -43,11 +60,20 @@ def _safe_amount(v: Any) -> float:
         return 0.0
 
 
+class VendorContext(NamedTuple):
+    """Per-dropshipper invoice fields derived from vendor_mapping."""
+
+    customer_ref: Ref
+    ship_ref: Ref
+    bill_email: Optional[EmailAddress]
+
+
 class QbInvoice:
     """Thin wrapper around QuickBooks invoice creation.
 
     Improvements:
     - Caches QBO references (Item/Class/Term/Customer) instead of fetching per line
+    - Prefetches all of those references in one QBO batch request on first use
     - Tolerates items shaped as (sku, qty) or (sku, qty, unit_cost)
     - Normalizes dates; safer numeric handling
     - Returns the created Invoice object on success (not just True)
@@ -79,6 +105,70 @@ class QbInvoice:
         self._class_ref: Optional[Ref] = None
         self._term_ref: Optional[Ref] = None
         self._customer_cache: Dict[Any, Ref] = {}
+        self._vendor_ctx_cache: Dict[Any, VendorContext] = {}
+        self._prefetched = False
+
+    # -------- Batched prefetch --------
+    def _prefetch_refs(self, customer_ids: Iterable[Any] = ()) -> None:
+        """Fill every ref cache with a single QBO batch request (once per instance).
+
+        Best-effort: on any failure the lazy getters below fetch what's missing.
+        """
+        if self._prefetched:
+            return
+        self._prefetched = True
+        self._batch_fetch_refs(customer_ids)
+
+    def _batch_fetch_refs(self, customer_ids: Iterable[Any]) -> None:
+        item_ids = (self.ITEM_ID, self.TAX_ITEM_ID, self.SHIPPING_ITEM_ID)
+        customer_ids = [c for c in dict.fromkeys(customer_ids) if c]
+
+        def _in(ids) -> str:
+            return ", ".join(f"'{i}'" for i in ids)
+
+        queries = [
+            ("items", f"SELECT * FROM Item WHERE Id IN ({_in(item_ids)})"),
+            ("class", f"SELECT * FROM Class WHERE Id = '{self.CLASS_ID}'"),
+            ("term", f"SELECT * FROM Term WHERE Id = '{self.TERM_ID}'"),
+        ]
+        if customer_ids:
+            queries.append(
+                ("customers", f"SELECT * FROM Customer WHERE Id IN ({_in(customer_ids)})")
+            )
+        body = {"BatchItemRequest": [{"bId": b, "Query": q} for b, q in queries]}
+
+        try:
+            resp = self.client.batch_operation(json.dumps(body))
+        except Exception as e:
+            print(f"[QbInvoice] Batch prefetch failed; falling back to lazy fetch: {e}")
+            return
+
+        # QBO ids come back as strings; key everything by str(id)
+        refs: Dict[str, Dict[str, Ref]] = {}
+        for entry in resp.get("BatchItemResponse", []):
+            found = entry.get("QueryResponse") or {}
+            for name, cls in (
+                ("Item", Item),
+                ("Class", Class),
+                ("Term", Term),
+                ("Customer", Customer),
+            ):
+                for data in found.get(name, []):
+                    refs.setdefault(name, {})[str(data.get("Id"))] = cls.from_json(
+                        data
+                    ).to_ref()
+
+        items = refs.get("Item", {})
+        self._item_ref = items.get(str(self.ITEM_ID))
+        self._tax_ref = items.get(str(self.TAX_ITEM_ID))
+        self._shipping_ref = items.get(str(self.SHIPPING_ITEM_ID))
+        self._class_ref = refs.get("Class", {}).get(str(self.CLASS_ID))
+        self._term_ref = refs.get("Term", {}).get(str(self.TERM_ID))
+        customers = refs.get("Customer", {})
+        for cid in customer_ids:
+            ref = customers.get(str(cid))
+            if ref:
+                self._customer_cache[cid] = ref
 
     # -------- Lazy ref getters --------
     def _get_item_ref(self) -> Ref:
@@ -116,6 +206,39 @@ class QbInvoice:
         self._customer_cache[customer_id] = ref
         return ref
 
+    def prepare_vendor_context(self, ds_name: Any, vm: Dict[str, Any]) -> VendorContext:
+        """Customer/ship-method refs and bill-to email for one dropshipper.
+        Built once per dropshipper and shared by all of its invoices.
+        """
+        ctx = self._vendor_ctx_cache.get(ds_name)
+        if ctx:
+            return ctx
+
+        # Ship method
+        ship_ref = Ref()
+        ship_method = vm.get("ship_method", "")
+        ship_ref.value = ship_method
+        ship_ref.name = ship_method
+
+        # Customer
+        customer_id = vm.get("customer_id")
+        if not customer_id:
+            raise ValueError(
+                f"Missing customer_id for dropshipper '{ds_name}' in vendor_mapping"
+            )
+        customer_ref = self._get_customer_ref(customer_id)
+
+        # Bill-to email (vendor contact)
+        bill_email = None
+        email = (vm.get("email") or "").strip()
+        if email:
+            bill_email = EmailAddress()
+            bill_email.Address = email
+
+        ctx = VendorContext(customer_ref, ship_ref, bill_email)
+        self._vendor_ctx_cache[ds_name] = ctx
+        return ctx
+
     # -------- Line builders --------
     def _sales_line(
         self,
@@ -162,99 +285,94 @@ class QbInvoice:
         return line
 
     # -------- Public methods --------
-    def create_invoice(
+    def build_invoice(
         self, order: Dict[str, Any], vendor_mapping: Dict[str, Dict[str, Any]]
-    ):
-        """Create and save an invoice in QuickBooks for a single order.
-        Returns the created Invoice on success; False on failure.
+    ) -> Invoice:
+        """Build (but don't save) the QuickBooks Invoice for a single order.
+        Raises on bad input (e.g. missing customer_id).
         """
-        try:
-            date_iso = _normalize_date(order.get("ship_date", ""))
-            ds_name = order.get("dropshipper_name")
-            vm = vendor_mapping.get(ds_name) or {}
-
-            item_ref = self._get_item_ref()
-            tax_ref = self._get_tax_ref()
-            shipping_ref = self._get_shipping_ref()
-            class_ref = self._get_class_ref()
-            term_ref = self._get_term_ref()
-
-            # Build line items from order lines
-            lines: list[SalesItemLine] = []
-            for tup in order.get("items", []):
-                sku = tup[0]
-                qty = tup[1]
-                unit_cost = tup[2] if len(tup) > 2 else 0
-                lines.append(
-                    self._sales_line(
-                        sku=sku,
-                        qty=qty,
-                        unit_cost=unit_cost,
-                        item_ref=item_ref,
-                        class_ref=class_ref,
-                        date_iso=date_iso,
-                    )
-                )
+        date_iso = _normalize_date(order.get("ship_date", ""))
+        ds_name = order.get("dropshipper_name")
 
-            # tax + shipping lines
+        # One batch round trip for every ref this run can need
+        self._prefetch_refs(
+            (m or {}).get("customer_id") for m in vendor_mapping.values()
+        )
+        ctx = self.prepare_vendor_context(ds_name, vendor_mapping.get(ds_name) or {})
+
+        item_ref = self._get_item_ref()
+        tax_ref = self._get_tax_ref()
+        shipping_ref = self._get_shipping_ref()
+        class_ref = self._get_class_ref()
+        term_ref = self._get_term_ref()
+
+        # Build line items from order lines
+        lines: list[SalesItemLine] = []
+        for tup in order.get("items", []):
+            sku = tup[0]
+            qty = tup[1]
+            unit_cost = tup[2] if len(tup) > 2 else 0
             lines.append(
-                self._single_qty_line(
-                    desc="Taxes",
-                    amount=order.get("tax", 0),
-                    item_ref=tax_ref,
+                self._sales_line(
+                    sku=sku,
+                    qty=qty,
+                    unit_cost=unit_cost,
+                    item_ref=item_ref,
                     class_ref=class_ref,
                     date_iso=date_iso,
                 )
             )
-            lines.append(
-                self._single_qty_line(
-                    desc="Shipping",
-                    amount=order.get("shipping", 0),
-                    item_ref=shipping_ref,
-                    class_ref=class_ref,
-                    date_iso=date_iso,
-                )
+
+        # tax + shipping lines
+        lines.append(
+            self._single_qty_line(
+                desc="Taxes",
+                amount=order.get("tax", 0),
+                item_ref=tax_ref,
+                class_ref=class_ref,
+                date_iso=date_iso,
             )
+        )
+        lines.append(
+            self._single_qty_line(
+                desc="Shipping",
+                amount=order.get("shipping", 0),
+                item_ref=shipping_ref,
+                class_ref=class_ref,
+                date_iso=date_iso,
+            )
+        )
 
-            # Ship method
-            ship_ref = Ref()
-            ship_method = vm.get("ship_method", "")
-            ship_ref.value = ship_method
-            ship_ref.name = ship_method
-
-            # Customer + terms
-            customer_id = vm.get("customer_id")
-            if not customer_id:
-                raise ValueError(
-                    f"Missing customer_id for dropshipper '{ds_name}' in vendor_mapping"
-                )
-            customer_ref = self._get_customer_ref(customer_id)
-
-            invoice = Invoice()
-            invoice.CustomerRef = customer_ref
-            invoice.SalesTermRef = term_ref
-            invoice.TrackingNum = order.get("tracking_number", "")
-            invoice.ShipDate = date_iso
-            invoice.Line = lines
-            invoice.TxnDate = date_iso
-            invoice.DocNumber = order.get("order_id", "")
-
-            # Bill-to email (vendor contact)
-            email = (vm.get("email") or "").strip()
-            if email:
-                invoice.BillEmail = EmailAddress()
-                invoice.BillEmail.Address = email
-
-            # Ship method + address
-            invoice.ShipMethodRef = ship_ref
-            invoice.ShipAddr = Address()
-            invoice.ShipAddr.City = order.get("city", "")
-            invoice.ShipAddr.CountrySubDivisionCode = order.get("state", "")
-            invoice.ShipAddr.Country = order.get("country", "")
-            invoice.ShipAddr.PostalCode = order.get("postal_code", "")
-            invoice.ShipAddr.Line1 = order.get("address", "")
-
-            # Persist
+        invoice = Invoice()
+        invoice.CustomerRef = ctx.customer_ref
+        invoice.SalesTermRef = term_ref
+        invoice.TrackingNum = order.get("tracking_number", "")
+        invoice.ShipDate = date_iso
+        invoice.Line = lines
+        invoice.TxnDate = date_iso
+        invoice.DocNumber = order.get("order_id", "")
+
+        if ctx.bill_email:
+            invoice.BillEmail = ctx.bill_email
+
+        # Ship method + address
+        invoice.ShipMethodRef = ctx.ship_ref
+        invoice.ShipAddr = Address()
+        invoice.ShipAddr.City = order.get("city", "")
+        invoice.ShipAddr.CountrySubDivisionCode = order.get("state", "")
+        invoice.ShipAddr.Country = order.get("country", "")
+        invoice.ShipAddr.PostalCode = order.get("postal_code", "")
+        invoice.ShipAddr.Line1 = order.get("address", "")
+        return invoice
+
+    def create_invoice(
+        self, order: Dict[str, Any], vendor_mapping: Dict[str, Dict[str, Any]]
+    ):
+        """Create and save an invoice in QuickBooks for a single order.
+        Returns the created Invoice on success; False on failure.
+        """
+        try:
+            invoice = self.build_invoice(order, vendor_mapping)
             invoice.save(qb=self.client)
             return invoice
 
@@ -262,6 +380,44 @@ class QbInvoice:
             print(f"Error creating invoice for order {order.get('order_id')}: {e}")
             return False
 
+    def create_invoices(
+        self,
+        orders: List[Dict[str, Any]],
+        vendor_mapping: Dict[str, Dict[str, Any]],
+    ) -> List[Any]:
+        """Batched create_invoice: returns the created Invoice or False per order,
+        in the same order as `orders`."""
+        built: List[Invoice] = []
+        for order in orders:
+            try:
+                built.append(self.build_invoice(order, vendor_mapping))
+            except Exception as e:
+                print(f"Error creating invoice for order {order.get('order_id')}: {e}")
+        saved = self.save_many(built)
+        return [saved.get(order.get("order_id", "")) or False for order in orders]
+
+    def save_many(self, invoices: List[Invoice]) -> Dict[str, Invoice]:
+        """Save invoices through the QBO batch endpoint (batch_create sends
+        them 30 per request). Returns {DocNumber: created Invoice}; faults are
+        logged and left out.
+        """
+        if not invoices:
+            return {}
+        try:
+            result = batch_create(invoices, qb=self.client)
+        except Exception as e:
+            for inv in invoices:
+                print(f"Error creating invoice for order {inv.DocNumber}: {e}")
+            return {}
+        saved: Dict[str, Invoice] = {}
+        for inv in result.successes:
+            saved[inv.DocNumber] = inv
+        for fault in result.faults:
+            doc = getattr(fault.original_object, "DocNumber", "")
+            errors = "; ".join(f"{err.Message}: {err.Detail}" for err in fault.Error)
+            print(f"Error creating invoice for order {doc}: {errors}")
+        return saved
+
     def check_exist(self, invoice_number: str):
         try:
             invs = Invoice.filter(DocNumber=invoice_number, qb=self.client)
@@ -270,6 +426,33 @@ class QbInvoice:
             print(f"Error while checking invoice existence: {e}")
             return False
 
+    def existing_doc_numbers(
+        self, doc_numbers: Iterable[str], chunk_size: int = 500
+    ) -> Dict[str, Invoice]:
+        """Bulk check_exist: {DocNumber: Invoice} for every doc number already in QBO.
+
+        One query per `chunk_size` doc numbers instead of one per order. Full
+        invoices are selected so callers get the same objects as check_exist.
+        """
+        unique = [d for d in dict.fromkeys(doc_numbers) if d]
+        found: Dict[str, Invoice] = {}
+        for i in range(0, len(unique), chunk_size):
+            chunk = unique[i : i + chunk_size]
+            in_list = ", ".join("'{}'".format(d.replace("'", "\\'")) for d in chunk)
+            try:
+                invs = Invoice.query(
+                    f"SELECT * FROM Invoice WHERE DocNumber IN ({in_list}) "
+                    f"MAXRESULTS 1000",
+                    qb=self.client,
+                )
+            except Exception as e:
+                print(f"Error while checking invoice existence: {e}")
+                continue
+            for inv in invs:
+                # Keep the first match, as check_exist does with invs[0]
+                found.setdefault(inv.DocNumber, inv)
+        return found
+
     def delete_invoice(self, invoice: Invoice) -> bool:
         try:
             invoice.delete(qb=self.client)
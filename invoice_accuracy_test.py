@@ -28,28 +28,34 @@ if api.client.refresh_token != current_refresh_token:
 incorrect_subtotal_orders = []
 invoice_not_found_orders = []
 
+# One QBO query per 500 invoices; the loop below is purely in-memory
+existing = api.existing_doc_numbers(invoiced_orders)
+
 for order_id, subtotal in tqdm(
-    invoiced_orders.items(), desc="Checking invoice accuracy"
+    invoiced_orders.items(), desc="Checking invoice accuracy", mininterval=0.5
 ):
-    invoice = api.check_exist(order_id)
+    invoice = existing.get(order_id)
     if invoice:
         if invoice.TotalAmt != round_to_decimal(subtotal):
             incorrect_subtotal_orders.append(order_id)
     else:
         invoice_not_found_orders.append(order_id)
 
-print("\nIncorrect subtotal orders:")
-print(
-    "\nNone"
-    if not incorrect_subtotal_orders
-    else "\n" + "\n".join("\t" + x for x in incorrect_subtotal_orders)
-)
-
-print("\n\nInvoices not found:")
-print(
-    "\nNone\n"
-    if not invoice_not_found_orders
-    else "\n" + "\n".join("\t" + x for x in invoice_not_found_orders)
+# Whole report in one write
+sys.stdout.write(
+    "\nIncorrect subtotal orders:\n"
+    + (
+        "\nNone"
+        if not incorrect_subtotal_orders
+        else "\n" + "\n".join("\t" + x for x in incorrect_subtotal_orders)
+    )
+    + "\n\n\nInvoices not found:\n"
+    + (
+        "\nNone\n"
+        if not invoice_not_found_orders
+        else "\n" + "\n".join("\t" + x for x in invoice_not_found_orders)
+    )
+    + "\n"
 )
 
 d_db.close()
@@ -1,8 +1,8 @@
 # invoice_fixer.py (kept; safer CSV reads)
+import codecs
 import pandas as pd
 from invoice import QbInvoice
 from quickbooks_db import QuickBooksDb
-from quickbooks.objects import Invoice
 
 qb_db = QuickBooksDb()
 current_refresh_token = qb_db.get_refresh_token()
@@ -11,10 +11,32 @@ if api.client.refresh_token != current_refresh_token:
     qb_db.update_refresh_token(api.client.refresh_token)
 
 
-def df_reader(file_path):
-    for enc in ("utf-8", "ISO-8859-1", "cp1252"):
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def _bom_encoding(file_path):
+    """Encoding named by the file's BOM, else None."""
+    with open(file_path, "rb") as fh:
+        head = fh.read(4)
+    for bom, enc in _BOMS:
+        if head.startswith(bom):
+            return enc
+    return None
+
+
+def df_reader(file_path, usecols=None):
+    # A BOM settles it in one read; otherwise UTF-8, then ISO-8859-1 (which
+    # decodes any byte sequence, so nothing is ever dropped).
+    bom_enc = _bom_encoding(file_path)
+    for enc in (bom_enc,) if bom_enc else ("utf-8", "ISO-8859-1"):
         try:
-            return pd.read_csv(file_path, dtype=str, encoding=enc)
+            return pd.read_csv(
+                file_path, dtype=str, encoding=enc, usecols=usecols, low_memory=False
+            )
         except UnicodeDecodeError:
             continue
     print(f"Error reading the file: could not decode {file_path}")
@@ -29,24 +51,28 @@ def fix_invoices():
     what_needs_to_be = "FEDEX Ground HD"
     email_sent_status = []
 
-    not_change_this = ["AAG1629506-1704718", "AAG1631212-1706505", "AAG1631404-1706705"]
+    not_change_this = {"AAG1629506-1704718", "AAG1631212-1706505", "AAG1631404-1706705"}
 
-    all_invoices_ids = []
+    # Only the invoice number column is needed; read just that and dedupe once
+    frames = [df_reader(folder + file, usecols=["Invoice Number"]) for file in files]
+    frames = [df for df in frames if df is not None]
+    all_invoices_ids = (
+        pd.concat(frames, ignore_index=True)["Invoice Number"].dropna().unique().tolist()
+        if frames
+        else []
+    )
 
-    for file in files:
-        df = df_reader(folder + file)
-        if df is None:
-            continue
-        df = df.dropna()
-        all_invoices_ids.extend(df["Invoice Number"].unique().tolist())
+    # One QBO query per 500 DocNumbers instead of one per invoice
+    invoices_by_doc = api.existing_doc_numbers(
+        id for id in all_invoices_ids if id not in not_change_this
+    )
 
     for id in all_invoices_ids:
         if id in not_change_this:
             continue
-        invs = Invoice.filter(DocNumber=id, qb=api.client)
-        if not invs:
+        invoice = invoices_by_doc.get(id)
+        if not invoice:
             continue
-        invoice = invs[0]
         if getattr(invoice, "EmailStatus", "") == "EmailSent":
             email_sent_status.append(id)
         if (
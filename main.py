@@ -1,4 +1,7 @@
 # main.py
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dropship_db import DropshipDb
 from quickbooks_db import QuickBooksDb
@@ -10,6 +13,33 @@ from email_helper import EmailHelper
 from process_logger import ProcessLogger
 from seller_cloud_data import get_sellercloud_data
 
+# Upper bound on dropshipper CSVs built concurrently
+MAX_FILE_WORKERS = 16
+
+
+def _build_invoice_file(
+    fh, invoice_csv_headers, dropshipper_data, orders, file_tag=None
+):
+    """
+    Build and save one dropshipper's invoice CSV.
+    Runs in a worker thread, so it only touches its own DfCreator and the shared
+    run-wide FileHandler (no DB or QuickBooks access).
+    `file_tag` keeps the file name unique when dropshippers share an FTP folder.
+    Returns (file_path or False, failed PO numbers).
+    """
+    df_creator = DfCreator(invoice_csv_headers, dropshipper_data)
+    failed = []
+    for order in orders:
+        if not df_creator.populate_df(order):
+            failed.append(order["purchase_order_number"])
+    if df_creator.is_empty():
+        return False, failed  # nothing to write
+    # Rows go straight to CSV bytes; no DataFrame is built just to serialize it
+    file_path = fh.save_bytes_to_file(
+        df_creator.to_csv_bytes(), dropshipper_data["ftp_folder_name"], file_tag
+    )
+    return file_path, failed
+
 
 def main():
     logger = ProcessLogger("dropship_sellercloud_qn_invoice_report")
@@ -17,7 +47,6 @@ def main():
     try:
         d_db = DropshipDb()
         qb_db = QuickBooksDb()
-        ftp = FTPManager()
         emailer = EmailHelper(test_recipient="rghanti@krameramerica.com")
 
         invoice_csv_headers = d_db.get_invoice_csv_headers()
@@ -39,42 +68,79 @@ def main():
         already_invoiced = {}
         file_paths = []
 
-        for dropshipper_info, dropshipper_data in orders_ready_to_invoice.items():
-            df_creator = DfCreator(invoice_csv_headers, dropshipper_data)
-            fh = FileHandler(datetime.now())
-            ftp_folder_name = dropshipper_data["ftp_folder_name"]
+        # One bulk existence query (chunked) instead of check_exist per order
+        existing = api.existing_doc_numbers(
+            order["order_id"]
+            for dropshipper_data in orders_ready_to_invoice.values()
+            for order in dropshipper_data["orders"]
+        )
 
+        to_create = []
+        for dropshipper_info, dropshipper_data in orders_ready_to_invoice.items():
             for order in dropshipper_data["orders"]:
-                invoice = api.check_exist(order["order_id"])
-                if invoice:
+                if existing.get(order["order_id"]):
                     already_invoiced.setdefault(dropshipper_info, []).append(
                         order["purchase_order_number"]
                     )
                     continue
+                to_create.append((dropshipper_info, order))
+
+        # Test mode: nothing is written to QuickBooks. Going live needs a
+        # vendor_mapping ({dropshipper name: {"customer_id", "ship_method", "email"}})
+        # loaded here, then QbInvoice.create_invoices(orders, vendor_mapping),
+        # which saves them through the QBO batch endpoint (30 per request).
+        invoiced_orders = {}
+        for dropshipper_info, order in to_create:
+            invoice_id = "TEST_ONLY_NO_QB"
+            if not invoice_id:
+                unable_to_invoice.setdefault(dropshipper_info, []).append(
+                    order["purchase_order_number"]
+                )
+                continue
+            invoiced_orders.setdefault(dropshipper_info, []).append(
+                (order, invoice_id)
+            )
 
-                # invoice_id = api.create(order)
-                invoice_id = "TEST_ONLY_NO_QB"
-                if not invoice_id:
-                    unable_to_invoice.setdefault(dropshipper_info, []).append(
-                        order["purchase_order_number"]
-                    )
-                    continue
-
-                success = df_creator.populate_df(order)
-                if not success:
-                    unable_to_invoice.setdefault(dropshipper_info, []).append(
-                        order["purchase_order_number"]
+        # Each dropshipper's CSV is independent; build them in parallel
+        if invoiced_orders:
+            # One report timestamp/FileHandler for the whole run
+            fh = FileHandler(datetime.now())
+            # Dropshipper codes sharing an ftp folder would all write the same
+            # Invoice_<date>.csv; tag those files with the dropshipper code.
+            folder_counts = Counter(ftp_folder for _, ftp_folder in invoiced_orders)
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_FILE_WORKERS, len(invoiced_orders))
+            ) as ex:
+                futures = {
+                    dropshipper_info: ex.submit(
+                        _build_invoice_file,
+                        fh,
+                        invoice_csv_headers,
+                        orders_ready_to_invoice[dropshipper_info],
+                        [order for order, _ in pairs],
+                        (
+                            dropshipper_info[0]
+                            if folder_counts[dropshipper_info[1]] > 1
+                            else None
+                        ),
                     )
-                    continue
-
-                # d_db.save_invoice_id(order["purchase_order_number"], invoice_id)
-
-            file_path = fh.save_data_to_file(df_creator.to_dataframe(), ftp_folder_name)
-            if file_path:
-                file_paths.append(file_path)
+                    for dropshipper_info, pairs in invoiced_orders.items()
+                }
+                for dropshipper_info, future in futures.items():
+                    file_path, failed = future.result()
+                    if failed:
+                        unable_to_invoice.setdefault(dropshipper_info, []).extend(
+                            failed
+                        )
+                    if file_path:
+                        file_paths.append(file_path)
+
+                    # Test mode: invoice ids aren't saved (d_db.save_invoice_ids)
 
         if file_paths:
-            ftp.upload_files(file_paths, test_mode=True)
+            # One FTP session for every file in the run
+            with FTPManager() as ftp:
+                ftp.upload_files(file_paths, test_mode=True)
 
             # 🔁 Combine SellerCloud enrichment errors into the same email:
         if unable_to_invoice or already_invoiced:
@@ -88,7 +154,12 @@ def main():
     except Exception as e:
         logger.log_error(str(e))
         raise
+    finally:
+        # Log rows are buffered; write them out even when main() raises
+        logger.close()
 
 
 if __name__ == "__main__":
+    # Plain messages for module loggers (e.g. "ftp"), matching the print output
+    logging.basicConfig(format="%(message)s")
     main()
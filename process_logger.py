@@ -5,36 +5,60 @@ import time
 
 
 class ProcessLogger:
+    # Buffered rows are written in one executemany once this many are pending
+    FLUSH_AT = 100
+
     def __init__(self, process_name):
         self.connection_string = create_connection_string(db_config["ProcessLogs"])
         self.connection = pyodbc.connect(self.connection_string)
         self.cursor = self.connection.cursor()
+        # Used only for the ActivityLogs INSERT so its prepared statement stays hot
+        self._insert_cursor = self.connection.cursor()
+        self._insert_cursor.fast_executemany = True
         self.process_name = process_name
         self.start_time = time.perf_counter()
+        # Resolved once instead of a subquery on every INSERT (None if unknown)
+        self.cursor.execute(
+            "SELECT process_id FROM Processes WHERE process_name = ?", process_name
+        )
+        row = self.cursor.fetchone()
+        self.process_id = row[0] if row else None
+        self._pending = []
 
     def log_process(self, status, error_code=None):
         allowed = ["success", "failed", "info"]
         if status not in allowed:
             raise ValueError(f"Invalid status: {status}. Allowed: {allowed}")
         duration = time.perf_counter() - self.start_time
-        if error_code is not None:
-            self.cursor.execute(
-                "INSERT INTO ActivityLogs (process_id, status, duration, error_code) "
-                "VALUES ((SELECT process_id FROM Processes WHERE process_name = ?), ?, ?, ?)",
-                self.process_name,
-                status,
-                duration,
-                error_code,
-            )
-        else:
-            self.cursor.execute(
-                "INSERT INTO ActivityLogs (process_id, status, duration) "
-                "VALUES ((SELECT process_id FROM Processes WHERE process_name = ?), ?, ?)",
-                self.process_name,
-                status,
-                duration,
-            )
+        self._pending.append((self.process_id, status, duration, error_code))
+        if len(self._pending) >= self.FLUSH_AT:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered log rows in a single executemany + commit."""
+        if not self._pending:
+            return
+        self._insert_cursor.executemany(
+            "INSERT INTO ActivityLogs (process_id, status, duration, error_code) "
+            "VALUES (?, ?, ?, ?)",
+            self._pending,
+        )
         self.connection.commit()
+        self._pending = []
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            for cursor in (self._insert_cursor, self.cursor):
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            try:
+                self.connection.close()
+            except Exception:
+                pass
 
     # Convenience wrappers
     def log_success(self, msg: str = ""):
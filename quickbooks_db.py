@@ -3,66 +3,105 @@ from __future__ import annotations
 
 import os
 import pyodbc
-from typing import Optional
+from typing import Dict, Optional, Set
 from config import create_connection_string, db_config
 
 # Candidate tables to try, in order
 _CANDIDATE_TABLES = ["QuickBooksTokens", "keys", "qb_tokens"]
 
+# connection string -> detected token table (process lifetime)
+_TABLE_CACHE: Dict[str, str] = {}
+
+# Connection strings whose DB has no sp_GetLatestQbToken (checked once per process).
+# Expected definition:
+#   CREATE PROCEDURE sp_GetLatestQbToken AS
+#       SELECT TOP 1 refresh_token, id FROM QuickBooksTokens ORDER BY id DESC
+_NO_TOKEN_PROC: Set[str] = set()
+
+# One connection shared by every QuickBooksDb in the process (see _get_conn)
+_shared_conn: Optional[pyodbc.Connection] = None
+
+
+def _get_conn(connection_string: str) -> pyodbc.Connection:
+    """
+    Lazily open the process-lifetime QuickBooks connection and reuse it, so
+    repeated QuickBooksDb() calls don't pay the login/TLS handshake again.
+    """
+    global _shared_conn
+    if _shared_conn is None or getattr(_shared_conn, "closed", False):
+        # Autocommit: every write here is a single INSERT, so no implicit
+        # transaction/commit round trip is needed.
+        _shared_conn = pyodbc.connect(connection_string, autocommit=True)
+    return _shared_conn
+
 
 class QuickBooksDb:
     def __init__(self) -> None:
-        self.conn = pyodbc.connect(create_connection_string(db_config["QuickBooks"]))
+        self.connection_string = create_connection_string(db_config["QuickBooks"])
+        self.conn = _get_conn(self.connection_string)
         self.cursor = self.conn.cursor()
-        self._token_table: Optional[str] = self._detect_table()
+        self.cursor.fast_executemany = True
+        # Token table is detected lazily; not needed when the stored procedure exists
+        self._token_table: Optional[str] = _TABLE_CACHE.get(self.connection_string)
+        self._table_checked = self._token_table is not None
+        self._token_sql: Optional[str] = None
+
+    def _get_token_table(self) -> Optional[str]:
+        if not self._table_checked:
+            self._table_checked = True
+            self._token_table = self._detect_table()
+            if self._token_table:
+                _TABLE_CACHE[self.connection_string] = self._token_table
+        return self._token_table
 
     def _detect_table(self) -> Optional[str]:
         """
         Return the first existing table from _CANDIDATE_TABLES, else None.
+        All candidates are checked in one INFORMATION_SCHEMA query.
         """
+        placeholders = ", ".join("?" * len(_CANDIDATE_TABLES))
+        try:
+            self.cursor.execute(
+                f"""
+                SELECT TABLE_NAME
+                FROM INFORMATION_SCHEMA.TABLES
+                WHERE TABLE_NAME IN ({placeholders})
+                """,
+                _CANDIDATE_TABLES,
+            )
+            found = {row[0] for row in self.cursor.fetchall()}
+        except Exception:
+            return None
+        # Keep the candidate preference order
         for tbl in _CANDIDATE_TABLES:
-            try:
-                # Use INFORMATION_SCHEMA to check existence
-                self.cursor.execute(
-                    """
-                    SELECT 1
-                    FROM INFORMATION_SCHEMA.TABLES
-                    WHERE TABLE_NAME = ?
-                    """,
-                    tbl,
-                )
-                if self.cursor.fetchone():
-                    return tbl
-            except Exception:
-                # Ignore and try next
-                continue
+            if tbl in found:
+                return tbl
         return None
 
     def get_refresh_token(self) -> str:
         """
         Get the latest QB refresh token.
         Priority:
+          0) From stored procedure sp_GetLatestQbToken (one round trip)
           1) From detected DB table (latest row by identity/created time heuristics)
           2) From environment variable QB_REFRESH_TOKEN
           3) Dummy token string (for tests), with a clear warning
         """
+        # 0) Stored procedure route
+        token = self._token_from_procedure()
+        if token:
+            return token
+
         # 1) DB table route
-        if self._token_table:
-            # Try common column names; fall back to the first found
-            queries = [
-                # Common: id/created_at DESC
-                f"SELECT TOP 1 refresh_token FROM {self._token_table} ORDER BY id DESC",
-                f"SELECT TOP 1 refresh_token FROM {self._token_table} ORDER BY created_at DESC",
-                f"SELECT TOP 1 refresh_token FROM {self._token_table}",
-            ]
-            for q in queries:
-                try:
-                    self.cursor.execute(q)
-                    row = self.cursor.fetchone()
-                    if row and row[0]:
-                        return str(row[0])
-                except Exception:
-                    continue  # try the next shape
+        sql = self._build_token_sql() if self._get_token_table() else None
+        if sql:
+            try:
+                self.cursor.execute(sql)
+                row = self.cursor.fetchone()
+                if row and row[0]:
+                    return str(row[0])
+            except Exception:
+                pass  # fall through to env/dummy
 
         # 2) Env var fallback for tests
         env_token = os.getenv("QB_REFRESH_TOKEN")
@@ -77,6 +116,48 @@ class QuickBooksDb:
         )
         return "DUMMY_REFRESH_TOKEN_FOR_TESTS"
 
+    def _token_from_procedure(self) -> Optional[str]:
+        """Latest token via {CALL sp_GetLatestQbToken}; None if unavailable."""
+        if self.connection_string in _NO_TOKEN_PROC:
+            return None
+        try:
+            self.cursor.execute("{CALL sp_GetLatestQbToken}")
+            row = self.cursor.fetchone()
+        except pyodbc.ProgrammingError:
+            # Procedure doesn't exist here; stop trying for this process
+            _NO_TOKEN_PROC.add(self.connection_string)
+            return None
+        except Exception:
+            return None
+        return str(row[0]) if row and row[0] else None
+
+    def _build_token_sql(self) -> Optional[str]:
+        """
+        Build the "latest refresh_token" query once from the table's real columns:
+        ORDER BY id DESC if there's an id, else created_at DESC, else unordered.
+        Returns None if the table has no refresh_token column.
+        """
+        if self._token_sql is not None:
+            return self._token_sql or None
+        try:
+            self.cursor.execute(
+                "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ?",
+                self._token_table,
+            )
+            columns = {row[0].lower() for row in self.cursor.fetchall()}
+        except Exception:
+            return None  # not cached; retried on the next call
+
+        sql = ""
+        if "refresh_token" in columns:
+            sql = f"SELECT TOP 1 refresh_token FROM {self._token_table}"
+            if "id" in columns:
+                sql += " ORDER BY id DESC"
+            elif "created_at" in columns:
+                sql += " ORDER BY created_at DESC"
+        self._token_sql = sql
+        return sql or None
+
     def update_refresh_token(self, refresh_token: str) -> bool:
         """
         Insert a new token row. If no table is detected, just warn and return True
@@ -85,7 +166,7 @@ class QuickBooksDb:
         if not refresh_token:
             return False
 
-        if not self._token_table:
+        if not self._get_token_table():
             print(
                 "[QuickBooksDb] No token table detected. Skipping DB insert of refresh token."
             )
@@ -102,7 +183,6 @@ class QuickBooksDb:
         for sql, params in attempts:
             try:
                 self.cursor.execute(sql, params)
-                self.conn.commit()
                 return True
             except Exception:
                 continue
@@ -114,11 +194,8 @@ class QuickBooksDb:
         return False
 
     def close(self) -> None:
+        """Close this instance's cursor; the shared connection lives for the process."""
         try:
             self.cursor.close()
         except Exception:
             pass
-        try:
-            self.conn.close()
-        except Exception:
-            pass
@@ -1,13 +1,37 @@
 # seller_cloud_api.py
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, Iterable, Tuple
 import requests
 from requests import Session
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from kramer_functions import AzureSecrets
 
+# username -> (authed session, access token); reused by every SellerCloudAPI
+# in the process and refreshed only when SellerCloud answers 401.
+_SESSION_CACHE: Dict[str, Tuple[Session, str]] = {}
+_SESSION_LOCK = threading.Lock()
+
+# Plain session for POST /token so retries (and re-auths) reuse the connection
+_TOKEN_SESSION = requests.Session()
+_TOKEN_ATTEMPTS = 3
+
+
+@lru_cache(maxsize=1)
+def _get_secrets() -> AzureSecrets:
+    return AzureSecrets()
+
+
+@lru_cache(maxsize=None)
+def _get_secret(name: str) -> str:
+    """Key Vault secret, fetched once per process (failures aren't cached)."""
+    return _get_secrets().get_secret(name)
+
 
 class SellerCloudAPI:
     """
@@ -17,10 +41,13 @@ class SellerCloudAPI:
     - Base URL: https://krameramerica.api.sellercloud.us/rest/api/
     - Methods:
         * get_order(order_id) -> Response
+        * get_orders_bulk(order_ids, handler=None) -> {order_id: result | None}  (concurrent GETs)
         * execute(data, action, **kwargs)  # small adapter to ease migration
     """
 
     BASE_URL = "https://krameramerica.api.sellercloud.us/rest/api/"
+    # Concurrent GETs in get_orders_bulk; the session's connection pool matches it
+    MAX_WORKERS = 16
 
     def __init__(
         self,
@@ -34,16 +61,19 @@ class SellerCloudAPI:
 
         # --- secrets via Kramer Functions (short, safe error) ---
         try:
-            secrets = AzureSecrets()
-            self.username = secrets.get_secret(username_secret)
-            self.password = secrets.get_secret(password_secret)
+            self.username = _get_secret(username_secret)
+            self.password = _get_secret(password_secret)
         except Exception:
             # keep message short so your ActivityLogs.error_code won't overflow
             raise RuntimeError("Missing SellerCloud username/password secrets in KV.")
 
-        # --- auth token + session ---
-        self.access_token = self._get_token(self.username, self.password, timeout)
-        self.session = self._create_session(self.access_token, max_retries)
+        # --- auth token + session (process-wide, see _SESSION_CACHE) ---
+        self.max_retries = max_retries
+        cached = _SESSION_CACHE.get(self.username)
+        if cached:
+            self.session, self.access_token = cached
+        else:
+            self._authenticate()
 
     # ------------------------------------------------------------------ #
     # Public API
@@ -52,9 +82,53 @@ class SellerCloudAPI:
         """
         GET a single order by ID from SellerCloud.
         Example: GET /Orders/{order_id}
+        The body is streamed (read only when asked for); close() the response
+        if you don't consume it so the connection goes back to the pool.
         """
         url = f"{self.BASE_URL}Orders/{order_id}"
-        return self.session.get(url, timeout=self.timeout)
+        session = self.session
+        resp = session.get(url, timeout=self.timeout, stream=True)
+        if resp.status_code == 401:
+            # Token expired: re-auth once (shared across threads) and retry
+            resp.close()
+            self._reauthenticate(session)
+            resp = self.session.get(url, timeout=self.timeout, stream=True)
+        return resp
+
+    def get_orders_bulk(
+        self,
+        order_ids: Iterable[str],
+        handler: Optional[Callable[[requests.Response], Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        GET many orders concurrently over the shared session.
+        Returns {order_id: Response}, or {order_id: handler(Response)} when a
+        handler is given; the handler runs in the worker thread (e.g. to parse
+        the streamed body) and the response is closed afterwards.
+        An id maps to None if its request or handler raised.
+        """
+        unique_ids = [str(i) for i in dict.fromkeys(order_ids) if i]
+        if not unique_ids:
+            return {}
+
+        def _fetch(order_id: str) -> Any:
+            try:
+                resp = self.get_order(order_id)
+            except Exception:
+                return None
+            if handler is None:
+                return resp
+            try:
+                return handler(resp)
+            except Exception:
+                return None
+            finally:
+                resp.close()
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_WORKERS, len(unique_ids))
+        ) as ex:
+            return dict(zip(unique_ids, ex.map(_fetch, unique_ids)))
 
     def execute(
         self,
@@ -82,16 +156,41 @@ class SellerCloudAPI:
     # ------------------------------------------------------------------ #
     # Internals
     # ------------------------------------------------------------------ #
+    def _authenticate(self) -> None:
+        self.access_token = self._get_token(self.username, self.password, self.timeout)
+        self.session = self._create_session(self.access_token, self.max_retries)
+        _SESSION_CACHE[self.username] = (self.session, self.access_token)
+
+    def _reauthenticate(self, stale: Session) -> None:
+        """Replace `stale` with a freshly authed session unless another thread already did."""
+        with _SESSION_LOCK:
+            cached = _SESSION_CACHE.get(self.username)
+            if cached and cached[0] is not stale:
+                self.session, self.access_token = cached
+                return
+            self._authenticate()
+
     def _get_token(self, username: str, password: str, timeout: int) -> str:
         """
         POST /token with Username/Password and return access_token.
         """
         url = f"{self.BASE_URL}token"
         payload = {"Username": username, "Password": password}
-        try:
-            resp = requests.post(url, json=payload, timeout=timeout)
-        except requests.RequestException:
-            raise RuntimeError("SellerCloud token request failed (network).")
+        # The session Retry only covers GETs; retry transient token failures
+        # (network errors / 5xx) here with 0.5s, 1s backoff.
+        for attempt in range(_TOKEN_ATTEMPTS):
+            last = attempt == _TOKEN_ATTEMPTS - 1
+            try:
+                resp = _TOKEN_SESSION.post(url, json=payload, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise RuntimeError("SellerCloud token request failed (network).")
+            except requests.RequestException:
+                raise RuntimeError("SellerCloud token request failed (network).")
+            else:
+                if resp.status_code < 500 or last:
+                    break
+            time.sleep(0.5 * (2**attempt))
 
         if resp.status_code != 200:
             # keep error short
@@ -125,7 +224,12 @@ class SellerCloudAPI:
             allowed_methods=frozenset({"GET"}),  # we only retry GETs
             raise_on_status=False,
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        # Roomy pool: the session is shared process-wide and by get_orders_bulk workers
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=32,
+            pool_maxsize=max(64, self.MAX_WORKERS),
+        )
         s.mount("https://", adapter)
         s.mount("http://", adapter)
         return s
@@ -1,11 +1,16 @@
 # seller_cloud_data.py
 from __future__ import annotations
 
+import json
 from typing import Dict, List, Tuple, Optional
-import traceback
 
 from seller_cloud_api import SellerCloudAPI
 
+try:  # faster bytes -> dict for large OrderItems payloads
+    from orjson import loads as _json_loads
+except ImportError:  # stdlib json also accepts bytes
+    _json_loads = json.loads
+
 DropshipperKey = Tuple[str, str]  # (dropshipper_code, ftp_folder_name)
 SC_OP_GET_ORDERS = "GET_ORDERS"
 
@@ -27,19 +32,18 @@ def _enrich_order_with_sc(order: dict, sellercloud_order: dict) -> bool:
             item.get("ProductIDOriginal"): item.get("LineTotal") for item in sc_items
         }
 
-        new_items: List[Tuple[str, int, float]] = []
-        for sku, qty, *rest in order.get("items", []):
-            if not sku:
-                return False
-            try:
-                qty_i = int(qty or 0)
-            except Exception:
-                qty_i = 0
-            line_total = id_to_line_total.get(sku)
-            if line_total is None or qty_i <= 0:
-                return False
-            unit_price = float(line_total) / float(qty_i)
-            new_items.append((sku, qty_i, unit_price))
+        items = order.get("items", [])
+        # A bad qty (int() raising) fails the whole order, same as qty <= 0
+        sku_qty = [(it[0], int(it[1] or 0)) for it in items]
+        new_items: List[Tuple[str, int, float]] = [
+            (sku, qty, float(line_total) / qty)
+            for sku, qty in sku_qty
+            for line_total in (id_to_line_total.get(sku),)
+            if sku and qty > 0 and line_total is not None
+        ]
+        # Any dropped line (missing SKU, no SC match, qty <= 0) fails the order
+        if len(new_items) != len(items):
+            return False
 
         order["items"] = new_items
         return True
@@ -47,6 +51,19 @@ def _enrich_order_with_sc(order: dict, sellercloud_order: dict) -> bool:
         return False
 
 
+def _read_order(response) -> Tuple[int, Optional[dict]]:
+    """
+    get_orders_bulk handler: (status_code, parsed body or None).
+    Runs in the fetch worker and parses the streamed body straight from the
+    socket, so no buffered copy of the response is kept.
+    """
+    status_code = response.status_code
+    if status_code != 200:
+        return status_code, None
+    response.raw.decode_content = True
+    return status_code, _json_loads(response.raw.read())
+
+
 def get_sellercloud_data(
     ready_to_invoice_orders: Dict[DropshipperKey, Dict[str, object]],
     *,
@@ -58,7 +75,8 @@ def get_sellercloud_data(
     - Attaches order-level tax and subtotal
     - Rewrites each item tuple (sku, qty) -> (sku, qty, unit_price)
     - Drops orders with missing/mismatched SKUs or failed API fetches
-    - Removes dropshipper buckets that end up empty
+    - Leaves out dropshipper buckets that end up empty (the input mapping itself
+      is not modified; a new one is returned)
 
     Returns:
         (enriched_orders, sc_errors)
@@ -75,24 +93,35 @@ def get_sellercloud_data(
         "unexpected_error": [],
     }
 
-    # Iterate over a copy so we can modify the original safely
-    for ds_key, ds_data in list(ready_to_invoice_orders.items()):
-        original_orders: List[dict] = list(ds_data.get("orders", []))
+    # Fetch every SellerCloud order up front, concurrently
+    fetched = sc_api.get_orders_bulk(
+        (
+            order.get("sellercloud_order_id")
+            for ds_data in ready_to_invoice_orders.values()
+            for order in ds_data.get("orders", [])
+        ),
+        handler=_read_order,
+    )
+
+    result: Dict[DropshipperKey, Dict[str, object]] = {}
+    for ds_key, ds_data in ready_to_invoice_orders.items():
         kept_orders: List[dict] = []
 
-        for order in original_orders:
+        for order in ds_data.get("orders") or ():
             po_number = order.get("purchase_order_number")
             sc_id = order.get("sellercloud_order_id")
 
             try:
-                response = sc_api.execute(
-                    {"url_args": {"order_id": sc_id}}, SC_OP_GET_ORDERS
-                )
-                if getattr(response, "status_code", None) != 200:
+                entry = fetched.get(str(sc_id)) if sc_id else None
+                if entry is None:
+                    # missing SellerCloud id, or the GET/parse raised in get_orders_bulk
+                    sc_errors["unexpected_error"].append(po_number)
+                    continue
+                status_code, sc_order = entry
+                if status_code != 200:
                     sc_errors["not_found_in_sc"].append(po_number)
                     continue
 
-                sc_order = response.json()
                 if not _enrich_order_with_sc(order, sc_order):
                     sc_errors["item_mismatch"].append(po_number)
                     continue
@@ -100,14 +129,11 @@ def get_sellercloud_data(
                 kept_orders.append(order)
 
             except Exception:
-                # Keep trace for local logs if you like; only PO numbers go to the error list
-                # print(traceback.format_exc())
+                # Only PO numbers go to the error list; no traceback is formatted
                 sc_errors["unexpected_error"].append(po_number)
                 continue
 
         if kept_orders:
-            ds_data["orders"] = kept_orders
-        else:
-            del ready_to_invoice_orders[ds_key]
+            result[ds_key] = {**ds_data, "orders": kept_orders}
 
-    return ready_to_invoice_orders, sc_errors
+    return result, sc_errors